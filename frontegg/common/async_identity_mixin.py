@@ -1,14 +1,22 @@
+from __future__ import annotations
+
 import asyncio
 
-import jwt
 import os
+import random
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.rsa import RSAPublicKey
+from httpx import HTTPStatusError
 from jwt import InvalidTokenError
-from typing import Optional
+from typing import Dict, NamedTuple, Optional
 
 from frontegg.common import FronteggAsyncAuthenticator
 from frontegg.common.clients.token_resolvers.async_access_token_resolver import AccessTokenAsyncResolver
 from frontegg.common.clients.token_resolvers.async_authorization_token_resolver import AuthorizationJWTAsyncResolver
 from frontegg.helpers.frontegg_urls import frontegg_urls
+from frontegg.helpers.json_utils import json_loads
+from frontegg.helpers.jwt_decoder import jwt_decoder
 from frontegg.helpers.logger import logger
 from frontegg.helpers.retry import retry
 from frontegg.common.clients.types import AuthHeaderType, IValidateTokenOptions
@@ -18,41 +26,159 @@ jwt_decode_retry = os.environ.get('FRONTEGG_JWT_DECODE_RETRY') or '1'
 jwt_decode_retry = int(jwt_decode_retry)
 jwt_decode_retry_delay = os.environ.get('FRONTEGG_JWT_DECODE_RETRY_DELAY_MS') or '0'
 jwt_decode_retry_delay = float(jwt_decode_retry_delay) / 1000
+public_key_refresh_interval = float(os.environ.get('FRONTEGG_PUBLIC_KEY_REFRESH_INTERVAL_SECONDS') or '600')
+public_key_fetch_retries = 10
+# total time spent waiting between attempts of a cold public key fetch
+public_key_retry_budget = 10.0
+
+
+def _strip_bearer(h: str) -> str:
+    return h[7:] if h[:7].lower() == 'bearer ' else h
+
+
+_ALGORITHMS = ['RS256']
+_VERIFIED_OPTIONS = {"verify_aud": False, "require": ["exp"]}
+_UNVERIFIED_OPTIONS = {"verify_aud": False, "verify_signature": False}
+
+
+@retry(action='decode jwt', total_tries=jwt_decode_retry, retry_delay=jwt_decode_retry_delay)
+def _decode_verified(jwt_token: str, public_key: RSAPublicKey) -> dict:
+    return jwt_decoder.decode(jwt_token, public_key, algorithms=_ALGORITHMS, options=_VERIFIED_OPTIONS)
+
+
+@retry(action='decode jwt', total_tries=jwt_decode_retry, retry_delay=jwt_decode_retry_delay)
+def _decode_unverified(jwt_token: str) -> dict:
+    return jwt_decoder.decode(jwt_token, algorithms=_ALGORITHMS, options=_UNVERIFIED_OPTIONS)
+
+
+def _retry_delay(retries: int) -> float:
+    # exponential backoff with jitter so clients do not retry in lockstep
+    return min(0.1 * (2 ** retries), 5) + random.uniform(0, 0.1)
+
+
+class _PublicKey(NamedTuple):
+    pem: str
+    key: RSAPublicKey
+
+
+# public keys shared by every identity client of the same vendor in this process, keyed by client id
+_PUBLIC_KEY_CACHE: Dict[str, _PublicKey] = {}
+# the in-flight cold fetch per client id, awaited by every caller that misses _PUBLIC_KEY_CACHE meanwhile
+_PUBLIC_KEY_FETCHES: Dict[str, asyncio.Future] = {}
+# one background refresher per client id keeps _PUBLIC_KEY_CACHE up to date
+_PUBLIC_KEY_REFRESH_TASKS: Dict[str, asyncio.Future] = {}
+
+
+def _is_stale(future: Optional[asyncio.Future]) -> bool:
+    # a future left over from an event loop that already finished can not be reused
+    return future is None or future.done() or future.get_loop().is_closed()
+
+
+def _watch_refresh_task(client_id: str, task: asyncio.Future) -> None:
+    def on_done(_task: asyncio.Future) -> None:
+        # the refresher stopped (usually with its event loop), so the cached key is no longer kept fresh;
+        # dropping it sends the next call down the cold path, which fetches the key and restarts the refresher
+        if _PUBLIC_KEY_REFRESH_TASKS.get(client_id) is task:
+            _PUBLIC_KEY_REFRESH_TASKS.pop(client_id, None)
+            _PUBLIC_KEY_CACHE.pop(client_id, None)
+
+    task.add_done_callback(on_done)
 
 
 class IdentityAsyncClientMixin:
-    __publicKey = None
-    __tokenResolvers = []
     def __init__(self, async_authenticator: FronteggAsyncAuthenticator):
         self.__async_authenticator = async_authenticator
-        self.__tokenResolvers = [AuthorizationJWTAsyncResolver(), AccessTokenAsyncResolver(async_authenticator)]
-
-    async def get_public_key(self) -> str:
-        if self.__publicKey:
-            return self.__publicKey
-
-        logger.info('could not find public key locally, will fetch public key')
+        self.__client_id = async_authenticator.client_id
+        self.__resolvers = {
+            AuthHeaderType.JWT.value: AuthorizationJWTAsyncResolver(),
+            AuthHeaderType.AccessToken.value: AccessTokenAsyncResolver(async_authenticator)
+        }
+
+    async def get_public_key(self) -> Optional[str]:
+        public_key = await self.__get_public_key()
+        return public_key.pem if public_key else None
+
+    def close(self) -> None:
+        task = _PUBLIC_KEY_REFRESH_TASKS.pop(self.__client_id, None)
+        if task is not None and not task.done() and not task.get_loop().is_closed():
+            task.cancel()
+
+    async def __get_public_key_obj(self) -> Optional[RSAPublicKey]:
+        public_key = await self.__get_public_key()
+        return public_key.key if public_key else None
+
+    async def __get_public_key(self) -> Optional[_PublicKey]:
+        public_key = _PUBLIC_KEY_CACHE.get(self.__client_id)
+        if public_key:
+            return public_key
+
+        if public_key_refresh_interval > 0 and _is_stale(_PUBLIC_KEY_REFRESH_TASKS.get(self.__client_id)):
+            task = asyncio.ensure_future(self.__refresh_public_key_loop())
+            _PUBLIC_KEY_REFRESH_TASKS[self.__client_id] = task
+            _watch_refresh_task(self.__client_id, task)
+
+        # all callers arriving while the key is being fetched share the same in-flight fetch
+        fetch = _PUBLIC_KEY_FETCHES.get(self.__client_id)
+        if _is_stale(fetch):
+            logger.info('could not find public key locally, will fetch public key')
+            fetch = asyncio.ensure_future(self.__fetch_public_key_with_retries())
+            _PUBLIC_KEY_FETCHES[self.__client_id] = fetch
+
+        return await asyncio.shield(fetch)
+
+    async def __fetch_public_key_with_retries(self) -> Optional[_PublicKey]:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + public_key_retry_budget
         reties = 0
-        while reties < 10:
+        while True:
             try:
-                self.__publicKey = await self.fetch_public_key()
-                return self.__publicKey
+                pem = await self.fetch_public_key()
             except Exception as e:
+                # client errors such as a bad api key will not be fixed by retrying
+                if isinstance(e, HTTPStatusError) and 400 <= e.response.status_code < 500 \
+                        and e.response.status_code != 429:
+                    logger.error('could not get public key from frontegg, will not retry, %s', e)
+                    return None
                 reties = reties + 1
-                logger.error(
-                    'could not get public key from frontegg, retry number - ' + str(reties) + ', ' + str(e))
-                await asyncio.sleep(1)
+                logger.error('could not get public key from frontegg, retry number - %s, %s', reties, e)
+                remaining = deadline - loop.time()
+                if reties >= public_key_fetch_retries or remaining <= 0:
+                    break
+                await asyncio.sleep(min(_retry_delay(reties), remaining))
+                continue
+
+            try:
+                return self.__set_public_key(pem)
+            except Exception as e:
+                # a missing or malformed key will come back the same on the next attempt
+                logger.error('got an invalid public key from frontegg, will not retry, %s', e)
+                return None
 
         logger.error('failed to get public key in all retries')
 
+    async def __refresh_public_key_loop(self) -> None:
+        while True:
+            await asyncio.sleep(public_key_refresh_interval)
+            try:
+                self.__set_public_key(await self.fetch_public_key())
+                logger.debug('public key was refreshed')
+            except Exception as e:
+                logger.error('could not refresh public key from frontegg, %s', e)
+
+    def __set_public_key(self, pem: str) -> _PublicKey:
+        # parse the PEM once so jwt.decode gets a ready key object instead of re-loading it per request
+        key = serialization.load_pem_public_key(pem.encode(), backend=default_backend())
+        _PUBLIC_KEY_CACHE[self.__client_id] = _PublicKey(pem, key)
+        return _PUBLIC_KEY_CACHE[self.__client_id]
+
     async def fetch_public_key(self) -> str:
         if self.__async_authenticator.should_refresh_vendor_token:
             await self.__async_authenticator.refresh_vendor_token()
 
         response = await self.__async_authenticator.vendor_session_request.get(
-            frontegg_urls.identity_service['vendor_config'], timeout=3)
+            frontegg_urls.identity_service['vendor_config'])
         response.raise_for_status()
-        data = response.json()
+        data = json_loads(response.content)
         return data.get('publicKey')
 
     async def validate_identity_on_token(
@@ -62,23 +188,16 @@ class IdentityAsyncClientMixin:
             type=AuthHeaderType.JWT.value
     ):
         if type == AuthHeaderType.JWT.value:
-            try:
-                token = token.replace("Bearer ", "")
-            except:
-                logger.error("Failed to extract token - ", token)
+            token = _strip_bearer(token)
 
         public_key = None
         try:
-            public_key = await self.get_public_key()
+            public_key = await self.__get_public_key_obj()
         except:
             logger.error("Failed to get public key - ")
             raise UnauthenticatedException()
 
-        resolver = None
-        for _resolver in self.__tokenResolvers:
-            if _resolver.should_handle(type) is True:
-                resolver = _resolver
-                break
+        resolver = self.__resolvers.get(type)
         if not resolver:
             logger.error("Failed to find token resolver")
             raise UnauthenticatedException()
@@ -89,18 +208,10 @@ class IdentityAsyncClientMixin:
     async def decode_jwt(self, authorization_header, verify: Optional[bool] = True):
         if not authorization_header:
             raise InvalidTokenError('Authorization headers is missing')
-        logger.debug('found authorization header: ' +
-                     str(authorization_header))
-        jwt_token = authorization_header.replace('Bearer ', '')
-        public_key = await self.get_public_key()
-        logger.debug('got public key' + str(public_key))
-        decoded = self.__get_jwt_data(jwt_token, verify, public_key)
+        logger.debug('found authorization header: %s', authorization_header)
+        jwt_token = _strip_bearer(authorization_header)
+        public_key = await self.__get_public_key_obj()
+        decoded = _decode_verified(jwt_token, public_key) if verify else _decode_unverified(jwt_token)
         logger.info('jwt was decoded successfully')
-        logger.debug('JWT value - ' + str(decoded))
+        logger.debug('JWT value - %s', decoded)
         return decoded
-
-    @retry(action='decode jwt', total_tries=jwt_decode_retry, retry_delay=jwt_decode_retry_delay)
-    def __get_jwt_data(self, jwt_token, verify, public_key):
-        if verify:
-            return jwt.decode(jwt_token, public_key, algorithms=['RS256'], options={"verify_aud": False})
-        return jwt.decode(jwt_token, algorithms=['RS256'], options={"verify_aud": False, "verify_signature": verify})
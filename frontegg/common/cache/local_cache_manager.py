@@ -7,29 +7,32 @@ T = TypeVar('T')
 
 
 class LocalCacheManager(Generic[T], CacheManager[T]):
-    def __init__(self):
+    def __init__(self, max_size: Optional[int] = None):
         self.cache: Dict[str, Tuple[Type[T], float]] = {}
+        self.max_size = max_size
 
     def set(self, key: str, data: Type[T], options: Optional[SetOptions] = None) -> None:
+        if self.max_size and key not in self.cache and len(self.cache) >= self.max_size:
+            # evict the oldest entry, dicts keep insertion order
+            try:
+                self.cache.pop(next(iter(self.cache)), None)
+            except (StopIteration, RuntimeError):
+                # another thread emptied or resized the cache meanwhile
+                pass
         if options and options.get('expires_in_seconds'):
             self.cache[key] = (data, time() + options.get('expires_in_seconds'))
         else:
             self.cache[key] = data
 
     def get(self, key: str) -> Optional[Type[T]]:
-        if key in self.cache:
-            if isinstance(self.cache[key], tuple):
-                if time() > self.cache[key][1]:
-                    del self.cache[key]
-                    return None
-                else:
-                    return self.cache[key][0]
-            else:
-                return self.cache[key]
-        else:
-            return None
+        data = self.cache.get(key)
+        if isinstance(data, tuple):
+            if time() > data[1]:
+                self.cache.pop(key, None)
+                return None
+            return data[0]
+        return data
 
     def delete(self, keys: List[str]) -> None:
         for key in keys:
-            if key in self.cache:
-                del self.cache[key]
+            self.cache.pop(key, None)
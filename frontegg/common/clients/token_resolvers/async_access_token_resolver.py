@@ -1,5 +1,7 @@
 from typing import Optional, List
 
+from cryptography.hazmat.primitives.asymmetric.rsa import RSAPublicKey
+
 from frontegg.common import FronteggAsyncAuthenticator
 from frontegg.common.cache.local_cache_manager import LocalCacheManager
 from frontegg.common.cache.redis_cache_manager import RedisCacheManager
@@ -28,7 +30,7 @@ class AccessTokenAsyncResolver(TokenResolver[IEntityWithRoles]):
     async def validate_token(
             self,
             token: str,
-            public_key: str,
+            public_key: RSAPublicKey,
             options: Optional[IValidateTokenOptions] = None
     ) -> IEntityWithRoles:
         entity = super().verify_token(token, public_key)
@@ -1,4 +1,5 @@
 from typing import Optional
+from cryptography.hazmat.primitives.asymmetric.rsa import RSAPublicKey
 from frontegg.common.clients.token_resolvers.token_resolver import TokenResolver
 from frontegg.common.clients.types import TokenTypes, AuthHeaderType, IEntityWithRoles, IValidateTokenOptions
 
@@ -10,7 +11,7 @@ class AuthorizationJWTAsyncResolver(TokenResolver[IEntityWithRoles]):
     async def validate_token(
             self,
             token: str,
-            public_key: str,
+            public_key: RSAPublicKey,
             options: Optional[IValidateTokenOptions] = None
     ) -> IEntityWithRoles:
         entity = super().verify_token(token, public_key)
@@ -1,30 +1,41 @@
 import jwt
 import abc
 import os
+from cryptography.hazmat.primitives.asymmetric.rsa import RSAPublicKey
+from hashlib import blake2b
+from time import time
 from typing import List, Optional, Union, TypeVar, Generic
+from frontegg.common.cache.local_cache_manager import LocalCacheManager
 from frontegg.common.clients.types import IEntity, IEntityWithRoles, IValidateTokenOptions, TokenTypes
+from frontegg.helpers.jwt_decoder import jwt_decoder
 from frontegg.helpers.logger import logger
 from frontegg.helpers.retry import retry
 from frontegg.helpers.exceptions import UnauthorizedException, UnauthenticatedException
 
 T = TypeVar('T', bound=IEntity)
+# the sync identity client passes the PEM string, the async one a pre-parsed key
+PublicKey = Union[str, RSAPublicKey]
 
 jwt_decode_retry = os.environ.get('FRONTEGG_JWT_DECODE_RETRY') or '1'
 jwt_decode_retry = int(jwt_decode_retry)
 jwt_decode_retry_delay = os.environ.get('FRONTEGG_JWT_DECODE_RETRY_DELAY_MS') or '0'
 jwt_decode_retry_delay = float(jwt_decode_retry_delay) / 1000
 
+verified_tokens_cache_ttl = int(os.environ.get('FRONTEGG_VERIFIED_TOKENS_CACHE_TTL_SECONDS') or '5')
+verified_tokens_cache_size = int(os.environ.get('FRONTEGG_VERIFIED_TOKENS_CACHE_SIZE') or '10000')
+
 
 class TokenResolver(Generic[T], abc.ABC):
     def __init__(self, allowed_token_types: List[TokenTypes], type: str):
         self.allowed_token_types = allowed_token_types
         self.type = type
+        self.verified_tokens_cache = LocalCacheManager(max_size=verified_tokens_cache_size)
 
     @abc.abstractmethod
-    def validate_token(self, token: str, public_key: str, options: Optional[IValidateTokenOptions] = None) -> Union[IEntity, IEntityWithRoles]:
+    def validate_token(self, token: str, public_key: PublicKey, options: Optional[IValidateTokenOptions] = None) -> Union[IEntity, IEntityWithRoles]:
         pass
 
-    def verify_token(self, token: str, public_key: str) -> IEntity:
+    def verify_token(self, token: str, public_key: PublicKey) -> IEntity:
         entity = self.verify_async(token, public_key)
         self.validate_token_type(entity.get('type'))
         return entity
@@ -66,16 +77,23 @@ class TokenResolver(Generic[T], abc.ABC):
     def should_handle(self, type: str) -> bool:
         return self.type == type
 
-    def verify_async(self, token: str, public_key: str) -> IEntity:
+    def verify_async(self, token: str, public_key: PublicKey) -> IEntity:
+        cache_key = blake2b(token.encode(), digest_size=16).hexdigest()
+        cached = self.verified_tokens_cache.get(cache_key)
+        if cached is not None and cached.get('exp', 0) > time() + 1:
+            return dict(cached)
+
         try:
             decoded = self.__get_jwt_data(token, public_key)
-            return decoded
+            if verified_tokens_cache_ttl > 0 and decoded.get('exp') is not None:
+                self.verified_tokens_cache.set(cache_key, decoded, {'expires_in_seconds': verified_tokens_cache_ttl})
+            return dict(decoded)
         except jwt.exceptions.DecodeError as e:
             logger.info('Failed to verify jwt - {}'.format(e))
             raise UnauthenticatedException()
 
     @retry(action='decode jwt', total_tries=jwt_decode_retry, retry_delay=jwt_decode_retry_delay)
-    def __get_jwt_data(self, token: str, public_key: str, verify: Optional[bool] = True):
+    def __get_jwt_data(self, token: str, public_key: PublicKey, verify: Optional[bool] = True):
         if verify:
-            return jwt.decode(token, public_key, algorithms=['RS256'], options={"verify_aud": False})
-        return jwt.decode(token, algorithms=['RS256'], options={"verify_aud": False, "verify_signature": verify})
+            return jwt_decoder.decode(token, public_key, algorithms=['RS256'], options={"verify_aud": False})
+        return jwt_decoder.decode(token, algorithms=['RS256'], options={"verify_aud": False, "verify_signature": verify})
@@ -1,4 +1,4 @@
-from httpx import AsyncClient
+from httpx import AsyncClient, Timeout
 import arrow
 from frontegg.common import FronteggConfig
 from frontegg.helpers.frontegg_urls import frontegg_urls
@@ -8,7 +8,7 @@ from frontegg.helpers.logger import logger
 class FronteggAsyncAuthenticator(FronteggConfig):
     __access_token = None
     __access_token_expiration = None
-    vendor_session_request = AsyncClient()
+    vendor_session_request = AsyncClient(timeout=Timeout(3))
 
     def __init__(self, client_id: str, api_key: str):
         super(FronteggAsyncAuthenticator, self).__init__(client_id, api_key)
@@ -31,7 +31,7 @@ class FronteggAsyncAuthenticator(FronteggConfig):
         logger.info('Will refresh vendor token')
         auth_url = frontegg_urls.authentication_service['authenticate_vendor']
 
-        auth_response = await self.vendor_session_request.post(auth_url, json=body, timeout=3)
+        auth_response = await self.vendor_session_request.post(auth_url, json=body)
         auth_response.raise_for_status()
         logger.info('Got a new vendor token from frontegg')
         response_body = auth_response.json()
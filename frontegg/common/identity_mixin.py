@@ -1,8 +1,9 @@
-import jwt
 import os
 from jwt import InvalidTokenError
 from typing import Optional
 from frontegg.helpers.frontegg_urls import frontegg_urls
+from frontegg.helpers.json_utils import json_loads
+from frontegg.helpers.jwt_decoder import jwt_decoder
 from frontegg.helpers.logger import logger
 from frontegg.helpers.retry import retry
 from frontegg.common.clients.token_resolvers.authorization_header_resolver import AuthorizationJWTResolver
@@ -50,7 +51,7 @@ class IdentityClientMixin:
         response = self.__authenticator.vendor_session_request.get(
             frontegg_urls.identity_service['vendor_config'], timeout=3)
         response.raise_for_status()
-        data = response.json()
+        data = json_loads(response.content)
         return data.get('publicKey')
 
     def validate_identity_on_token(
@@ -100,5 +101,5 @@ class IdentityClientMixin:
     @retry(action='decode jwt', total_tries=jwt_decode_retry, retry_delay=jwt_decode_retry_delay)
     def __get_jwt_data(self, jwt_token, verify, public_key):
         if verify:
-            return jwt.decode(jwt_token, public_key, algorithms=['RS256'], options={"verify_aud": False})
-        return jwt.decode(jwt_token, algorithms=['RS256'], options={"verify_aud": False, "verify_signature": verify})
+            return jwt_decoder.decode(jwt_token, public_key, algorithms=['RS256'], options={"verify_aud": False})
+        return jwt_decoder.decode(jwt_token, algorithms=['RS256'], options={"verify_aud": False, "verify_signature": verify})
@@ -37,6 +37,9 @@ class Frontegg:
     async def get_public_key(self) -> str:
         return await self.async_identity_client.get_public_key()
 
+    def close(self) -> None:
+        self.async_identity_client.close()
+
     async def fetch_public_key(self) -> str:
         return await self.async_identity_client.fetch_public_key()
 
@@ -18,6 +18,7 @@ class Frontegg:
     @property
     def api_key(self): ...
     async def get_public_key(self) -> str: ...
+    def close(self) -> None: ...
     async def fetch_public_key(self) -> str: ...
     async def validate_identity_on_token(self, token, options, type): ...
     async def decode_jwt(self, authorization_header, verify: Optional[bool] = ...): ...
@@ -1,4 +1,5 @@
-import typing
+from __future__ import annotations
+from typing import Optional
 from functools import wraps
 import frontegg.flask as __frontegg
 from flask import request, abort
@@ -9,8 +10,8 @@ from frontegg.helpers.exceptions import UnauthorizedException
 
 
 def with_authentication(
-        permission_keys: typing.Optional[list] = None,
-        role_keys: typing.Optional[list] = None
+        permission_keys: Optional[list] = None,
+        role_keys: Optional[list] = None
 ):
     def decorator(f):
         @wraps(f)
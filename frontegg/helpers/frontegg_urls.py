@@ -14,6 +14,19 @@ class FronteggUrls:
         self.__metadata_base_url = os.environ.get('FRONTEGG_METADATA_SERVICE_URL', urljoin(self.base_url, 'metadata/'))
         self.__identity_base_url = os.environ.get('FRONTEGG_IDENTITY_SERVICE_URL', urljoin(self.base_url, 'identity/'))
 
+        self.__authentication_service = {
+            'base_url': self.__authentication_base_url,
+            'authenticate_vendor': urljoin(self.__authentication_base_url, 'vendor/')
+        }
+        self.__audits_service = {
+            'base_url': self.__audits_base_url,
+            'send_audits': ''
+        }
+        self.__identity_service = {
+            'base_url': self.__identity_base_url,
+            'vendor_config': urljoin(self.__identity_base_url, 'resources/configurations/v1/')
+        }
+
     @property
     def base_url(self) -> str:
         if not self.__base_url.endswith('/'):
@@ -22,24 +35,15 @@ class FronteggUrls:
 
     @property
     def authentication_service(self) -> Dict[str, str]:
-        return {
-            'base_url': self.__authentication_base_url,
-            'authenticate_vendor': urljoin(self.__authentication_base_url, 'vendor/')
-        }
+        return self.__authentication_service
 
     @property
     def audits_service(self) -> Dict[str, str]:
-        return {
-            'base_url': self.__audits_base_url,
-            'send_audits': ''
-        }
+        return self.__audits_service
 
     @property
     def identity_service(self) -> Dict[str, str]:
-        return {
-            'base_url': self.__identity_base_url,
-            'vendor_config': urljoin(self.__identity_base_url, 'resources/configurations/v1/')
-        }
+        return self.__identity_service
 
 
 frontegg_urls = FronteggUrls()
@@ -0,0 +1,9 @@
+import json
+
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
+__all__ = 'json_loads'
@@ -0,0 +1,19 @@
+from typing import Any, Dict
+from jwt import PyJWT, DecodeError
+from frontegg.helpers.json_utils import json_loads
+
+
+class FronteggPyJWT(PyJWT):
+    def _decode_payload(self, decoded: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            payload = json_loads(decoded['payload'])
+        except (ValueError, RecursionError) as e:
+            raise DecodeError('Invalid payload string: {}'.format(e))
+        if not isinstance(payload, dict):
+            raise DecodeError('Invalid payload string: must be a json object')
+        return payload
+
+
+jwt_decoder = FronteggPyJWT()
+
+__all__ = 'jwt_decoder'
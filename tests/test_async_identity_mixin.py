@@ -0,0 +1,290 @@
+import asyncio
+import time
+
+import httpx
+import jwt
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+import frontegg.common.async_identity_mixin as async_identity_mixin
+from frontegg.common import FronteggAsyncAuthenticator, IdentityAsyncClientMixin
+
+
+def create_private_key() -> rsa.RSAPrivateKey:
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+def to_pem(private_key: rsa.RSAPrivateKey) -> str:
+    return private_key.public_key().public_bytes(serialization.Encoding.PEM,
+                                                 serialization.PublicFormat.SubjectPublicKeyInfo).decode()
+
+
+def create_pem() -> str:
+    return to_pem(create_private_key())
+
+
+@pytest.fixture(scope='module')
+def private_key():
+    return create_private_key()
+
+
+@pytest.fixture(scope='module')
+def pem(private_key):
+    return to_pem(private_key)
+
+
+@pytest.fixture(autouse=True)
+def reset_public_keys(monkeypatch):
+    monkeypatch.setattr(async_identity_mixin, 'public_key_refresh_interval', 0)
+    async_identity_mixin._PUBLIC_KEY_CACHE.clear()
+    async_identity_mixin._PUBLIC_KEY_FETCHES.clear()
+    async_identity_mixin._PUBLIC_KEY_REFRESH_TASKS.clear()
+    yield
+    async_identity_mixin._PUBLIC_KEY_CACHE.clear()
+    async_identity_mixin._PUBLIC_KEY_FETCHES.clear()
+    async_identity_mixin._PUBLIC_KEY_REFRESH_TASKS.clear()
+
+
+class FakeIdentityClient(IdentityAsyncClientMixin):
+    def __init__(self, pems, delay=0.05, client_id='the-client-id'):
+        super().__init__(FronteggAsyncAuthenticator(client_id, 'my-api-key'))
+        self.pems = pems
+        self.delay = delay
+        self.fetches = 0
+
+    async def fetch_public_key(self) -> str:
+        self.fetches += 1
+        await asyncio.sleep(self.delay)
+        return self.pems[min(self.fetches, len(self.pems)) - 1]
+
+
+def test_concurrent_cold_callers_share_one_fetch(pem):
+    client = FakeIdentityClient([pem])
+
+    async def run():
+        return await asyncio.gather(*[client.get_public_key() for _ in range(20)])
+
+    keys = asyncio.run(run())
+
+    assert keys == [pem] * 20
+    assert client.fetches == 1
+
+
+def test_cancelled_waiter_does_not_cancel_shared_fetch(pem):
+    client = FakeIdentityClient([pem])
+
+    async def run():
+        waiters = [asyncio.ensure_future(client.get_public_key()) for _ in range(5)]
+        await asyncio.sleep(0)
+        waiters[0].cancel()
+        return await asyncio.gather(*waiters, return_exceptions=True)
+
+    results = asyncio.run(run())
+
+    assert isinstance(results[0], asyncio.CancelledError)
+    assert results[1:] == [pem] * 4
+    assert client.fetches == 1
+
+
+def test_public_key_is_shared_by_client_id(pem):
+    first = FakeIdentityClient([pem])
+    second = FakeIdentityClient([pem])
+
+    async def run():
+        return await first.get_public_key(), await second.get_public_key()
+
+    assert asyncio.run(run()) == (pem, pem)
+    assert first.fetches + second.fetches == 1
+
+
+def test_concurrent_cold_clients_of_one_vendor_share_one_fetch(pem):
+    first = FakeIdentityClient([pem])
+    second = FakeIdentityClient([pem])
+    other_vendor = FakeIdentityClient([pem], client_id='other-client-id')
+
+    async def run():
+        return await asyncio.gather(first.get_public_key(), second.get_public_key(), other_vendor.get_public_key())
+
+    assert asyncio.run(run()) == [pem] * 3
+    assert first.fetches + second.fetches == 1
+    assert other_vendor.fetches == 1
+
+
+def test_public_key_is_refreshed_in_background(pem, monkeypatch):
+    monkeypatch.setattr(async_identity_mixin, 'public_key_refresh_interval', 0.01)
+    rotated_pem = create_pem()
+    client = FakeIdentityClient([pem, rotated_pem], delay=0)
+
+    async def run():
+        before = await client.get_public_key()
+        await asyncio.sleep(0.05)
+        return before, await client.get_public_key()
+
+    assert asyncio.run(run()) == (pem, rotated_pem)
+    assert client.fetches > 2
+
+
+def test_refresh_task_restarts_on_a_new_event_loop(pem, monkeypatch):
+    monkeypatch.setattr(async_identity_mixin, 'public_key_refresh_interval', 0.01)
+    client = FakeIdentityClient([pem], delay=0)
+
+    async def run():
+        await client.get_public_key()
+        await asyncio.sleep(0.05)
+        return async_identity_mixin._PUBLIC_KEY_REFRESH_TASKS['the-client-id']
+
+    first_task = asyncio.run(run())
+    fetches_after_first_loop = client.fetches
+    second_task = asyncio.run(run())
+
+    assert first_task.cancelled()
+    assert second_task is not first_task
+    assert client.fetches > fetches_after_first_loop + 1
+
+
+def test_stopped_refresher_is_restarted_by_the_next_call(pem, monkeypatch):
+    monkeypatch.setattr(async_identity_mixin, 'public_key_refresh_interval', 60)
+    client = FakeIdentityClient([pem], delay=0)
+
+    async def run():
+        await client.get_public_key()
+        first_task = async_identity_mixin._PUBLIC_KEY_REFRESH_TASKS['the-client-id']
+        first_task.cancel()
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        cached_after_stop = 'the-client-id' in async_identity_mixin._PUBLIC_KEY_CACHE
+        await client.get_public_key()
+        return first_task, cached_after_stop, async_identity_mixin._PUBLIC_KEY_REFRESH_TASKS['the-client-id']
+
+    first_task, cached_after_stop, second_task = asyncio.run(run())
+
+    assert not cached_after_stop
+    assert second_task is not first_task
+    assert client.fetches == 2
+
+
+def test_one_refresher_per_client_id(pem, monkeypatch):
+    monkeypatch.setattr(async_identity_mixin, 'public_key_refresh_interval', 0.01)
+    first = FakeIdentityClient([pem], delay=0)
+    second = FakeIdentityClient([pem], delay=0)
+    other_vendor = FakeIdentityClient([pem], delay=0, client_id='other-client-id')
+
+    async def run():
+        await first.get_public_key()
+        first_task = async_identity_mixin._PUBLIC_KEY_REFRESH_TASKS['the-client-id']
+        await asyncio.gather(second.get_public_key(), other_vendor.get_public_key())
+        return first_task, dict(async_identity_mixin._PUBLIC_KEY_REFRESH_TASKS)
+
+    first_task, tasks = asyncio.run(run())
+
+    assert set(tasks) == {'the-client-id', 'other-client-id'}
+    assert tasks['the-client-id'] is first_task
+    assert second.fetches == 0
+
+
+def test_close_stops_the_refresher(pem, monkeypatch):
+    monkeypatch.setattr(async_identity_mixin, 'public_key_refresh_interval', 0.01)
+    client = FakeIdentityClient([pem], delay=0)
+
+    async def run():
+        await client.get_public_key()
+        task = async_identity_mixin._PUBLIC_KEY_REFRESH_TASKS['the-client-id']
+        client.close()
+        fetches = client.fetches
+        await asyncio.sleep(0.05)
+        return task, fetches
+
+    task, fetches = asyncio.run(run())
+
+    assert task.cancelled()
+    assert client.fetches == fetches
+    assert 'the-client-id' not in async_identity_mixin._PUBLIC_KEY_REFRESH_TASKS
+
+
+def test_client_error_is_not_retried(caplog):
+    request = httpx.Request('GET', 'https://api.frontegg.com/identity/resources/configurations/v1/')
+    response = httpx.Response(401, request=request)
+
+    class UnauthorizedIdentityClient(FakeIdentityClient):
+        async def fetch_public_key(self) -> str:
+            self.fetches += 1
+            raise httpx.HTTPStatusError('unauthorized', request=request, response=response)
+
+    client = UnauthorizedIdentityClient([])
+
+    assert asyncio.run(client.get_public_key()) is None
+    assert client.fetches == 1
+    assert 'failed to get public key in all retries' not in caplog.text
+
+
+class FailingIdentityClient(FakeIdentityClient):
+    async def fetch_public_key(self) -> str:
+        self.fetches += 1
+        raise httpx.ConnectError('connection refused')
+
+
+def test_no_sleep_after_the_last_attempt(monkeypatch):
+    delays = []
+
+    def no_delay(retries):
+        delays.append(retries)
+        return 0
+
+    monkeypatch.setattr(async_identity_mixin, '_retry_delay', no_delay)
+    client = FailingIdentityClient([])
+
+    assert asyncio.run(client.get_public_key()) is None
+    assert client.fetches == async_identity_mixin.public_key_fetch_retries
+    assert len(delays) == client.fetches - 1
+
+
+def test_retries_stop_when_the_wait_budget_is_spent(monkeypatch):
+    monkeypatch.setattr(async_identity_mixin, 'public_key_retry_budget', 0.05)
+    monkeypatch.setattr(async_identity_mixin, '_retry_delay', lambda retries: 0.03)
+    client = FailingIdentityClient([])
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await client.get_public_key()
+        return loop.time() - started
+
+    elapsed = asyncio.run(run())
+
+    assert 1 < client.fetches < async_identity_mixin.public_key_fetch_retries
+    assert elapsed < 0.5
+
+
+@pytest.mark.parametrize('invalid_key', (None, 'not a pem'))
+def test_invalid_public_key_is_not_retried(invalid_key):
+    client = FakeIdentityClient([invalid_key], delay=0)
+
+    assert asyncio.run(client.get_public_key()) is None
+    assert client.fetches == 1
+
+
+def test_decode_jwt_decodes_verified_token_with_exp(private_key, pem):
+    client = FakeIdentityClient([pem], delay=0)
+    claims = {'sub': 'user-id', 'exp': int(time.time()) + 60}
+    token = jwt.encode(claims, private_key, algorithm='RS256')
+
+    assert asyncio.run(client.decode_jwt('Bearer ' + token)) == claims
+
+
+def test_decode_jwt_requires_exp_when_verifying(private_key, pem):
+    client = FakeIdentityClient([pem], delay=0)
+    token = jwt.encode({'sub': 'user-id'}, private_key, algorithm='RS256')
+
+    with pytest.raises(jwt.MissingRequiredClaimError):
+        asyncio.run(client.decode_jwt('Bearer ' + token))
+
+
+def test_decode_jwt_without_verify_skips_signature_check(pem):
+    client = FakeIdentityClient([pem], delay=0)
+    claims = {'sub': 'user-id'}
+    token = jwt.encode(claims, create_private_key(), algorithm='RS256')
+
+    with pytest.raises(jwt.InvalidSignatureError):
+        asyncio.run(client.decode_jwt('Bearer ' + token))
+    assert asyncio.run(client.decode_jwt('Bearer ' + token, verify=False)) == claims
@@ -0,0 +1,115 @@
+import time
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+import frontegg.common.cache.local_cache_manager as local_cache_manager
+import frontegg.common.clients.token_resolvers.token_resolver as token_resolver
+from frontegg.common.cache.local_cache_manager import LocalCacheManager
+from frontegg.common.clients.token_resolvers.authorization_header_resolver import AuthorizationJWTResolver
+
+
+@pytest.fixture(scope='module')
+def private_key():
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+@pytest.fixture
+def decode_calls(monkeypatch):
+    calls = []
+    decode = token_resolver.jwt_decoder.decode
+
+    def counting_decode(*args, **kwargs):
+        calls.append(args[0])
+        return decode(*args, **kwargs)
+
+    monkeypatch.setattr(token_resolver.jwt_decoder, 'decode', counting_decode)
+    return calls
+
+
+def create_token(private_key, **claims):
+    payload = {'sub': 'user-id', 'type': 'userToken', 'roles': ['admin'], 'permissions': [], **claims}
+    return jwt.encode(payload, private_key, algorithm='RS256')
+
+
+def test_verified_token_is_served_from_cache(private_key, decode_calls):
+    resolver = AuthorizationJWTResolver()
+    token = create_token(private_key, exp=int(time.time()) + 60)
+
+    first = resolver.validate_token(token, private_key.public_key())
+    second = resolver.validate_token(token, private_key.public_key())
+
+    assert first == second
+    assert first is not second
+    assert len(decode_calls) == 1
+
+
+def test_cached_token_still_checks_roles(private_key, decode_calls):
+    resolver = AuthorizationJWTResolver()
+    token = create_token(private_key, exp=int(time.time()) + 60)
+
+    resolver.validate_token(token, private_key.public_key(), {'roles': ['admin']})
+    with pytest.raises(token_resolver.UnauthorizedException):
+        resolver.validate_token(token, private_key.public_key(), {'roles': ['viewer']})
+
+    assert len(decode_calls) == 1
+
+
+def test_cache_entry_expires_after_ttl(private_key, decode_calls, monkeypatch):
+    now = time.time()
+    monkeypatch.setattr(local_cache_manager, 'time', lambda: now)
+    resolver = AuthorizationJWTResolver()
+    token = create_token(private_key, exp=int(now) + 60)
+
+    resolver.validate_token(token, private_key.public_key())
+    now += token_resolver.verified_tokens_cache_ttl + 1
+    resolver.validate_token(token, private_key.public_key())
+
+    assert len(decode_calls) == 2
+
+
+def test_token_about_to_expire_is_verified_again(private_key, decode_calls):
+    resolver = AuthorizationJWTResolver()
+    token = create_token(private_key, exp=int(time.time()) + 1)
+
+    resolver.validate_token(token, private_key.public_key())
+    resolver.validate_token(token, private_key.public_key())
+
+    assert len(decode_calls) == 2
+
+
+def test_token_without_exp_is_not_cached(private_key, decode_calls):
+    resolver = AuthorizationJWTResolver()
+    token = create_token(private_key)
+
+    resolver.validate_token(token, private_key.public_key())
+    resolver.validate_token(token, private_key.public_key())
+
+    assert len(decode_calls) == 2
+    assert resolver.verified_tokens_cache.cache == {}
+
+
+def test_local_cache_manager_evicts_oldest_entry():
+    cache = LocalCacheManager(max_size=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.set('a', 3)
+    cache.set('c', 4)
+
+    assert cache.get('a') is None
+    assert cache.get('b') == 2
+    assert cache.get('c') == 4
+
+
+def test_local_cache_manager_drops_expired_entry(monkeypatch):
+    now = time.time()
+    monkeypatch.setattr(local_cache_manager, 'time', lambda: now)
+    cache = LocalCacheManager()
+    cache.set('a', 1, {'expires_in_seconds': 5})
+
+    assert cache.get('a') == 1
+    now += 6
+    assert cache.get('a') is None
+    assert cache.get('a') is None
+    cache.delete(['a', 'missing'])